@@ -2,62 +2,125 @@
 """Extract JOTY nominations with context from iMessage database."""
 
 import sqlite3
+from bisect import bisect_left
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DB_PATH = Path.home() / "Library/Messages/chat.db"
 OUTPUT_PATH = Path(__file__).parent / "joty_contexts.json"
 
+# Tapback reactions ("Loved “...”" and friends) are stored as ordinary messages
+TAPBACK_FILTER = """
+    AND m.text NOT LIKE 'Loved %'
+    AND m.text NOT LIKE 'Liked %'
+    AND m.text NOT LIKE 'Emphasized %'
+    AND m.text NOT LIKE 'Laughed at %'
+    AND m.text NOT LIKE 'Disliked %'
+"""
+CONTEXT_FILTER = """
+    AND m.text IS NOT NULL
+    AND m.text != ''
+""" + TAPBACK_FILTER
+
+# Stay well under SQLite's default limit of 999 bound parameters per statement
+SQL_CHUNK_SIZE = 900
+
+READONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA cache_size = -262144",  # 256 MB page cache
+    "PRAGMA mmap_size = 1073741824",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Nominations are collected from local midnight on New Year's Day onward
+YEAR_START = datetime(2025, 1, 1)
+
 def apple_time_to_datetime(apple_time):
     """Convert Apple's timestamp to datetime."""
     unix_timestamp = apple_time / 1_000_000_000 + 978307200
     return datetime.fromtimestamp(unix_timestamp)
 
+def datetime_to_apple_time(dt):
+    """Convert a local datetime to Apple's timestamp."""
+    return (int(dt.timestamp()) - 978307200) * 1_000_000_000
+
 def get_joty_messages(conn):
     """Get all JOTY nomination messages from 2025."""
-    cursor = conn.cursor()
-
     # Get JOTY messages that are actual nominations (just "JOTY" or "JOTY [name]")
-    cursor.execute("""
+    cursor = conn.execute(f"""
         SELECT
             m.ROWID,
             m.date,
             m.text,
             m.is_from_me,
             m.handle_id,
-            m.cache_roomnames
+            m.cache_roomnames,
+            h.id AS sender_id
         FROM message m
-        WHERE LOWER(m.text) LIKE '%joty%'
-        AND datetime(m.date/1000000000 + 978307200, 'unixepoch', 'localtime') >= '2025-01-01'
-        AND m.text NOT LIKE 'Loved %'
-        AND m.text NOT LIKE 'Liked %'
-        AND m.text NOT LIKE 'Emphasized %'
-        AND m.text NOT LIKE 'Laughed at %'
-        AND m.text NOT LIKE 'Disliked %'
+        LEFT JOIN handle h ON m.handle_id = h.ROWID
+        WHERE m.text LIKE '%joty%'  -- LIKE is already case-insensitive for ASCII
+        AND m.date >= ?
+        {TAPBACK_FILTER}
         AND LENGTH(TRIM(m.text)) <= 30  -- Short messages are likely nominations
         ORDER BY m.date
-    """)
+    """, (datetime_to_apple_time(YEAR_START),))
 
     return cursor.fetchall()
 
-def get_context_messages(conn, joty_rowid, joty_date, cache_roomnames, num_before=15):
-    """Get messages before the JOTY nomination in the same chat."""
-    cursor = conn.cursor()
-
-    # Find the chat this message belongs to
-    cursor.execute("""
-        SELECT chat_id FROM chat_message_join WHERE message_id = ?
-    """, (joty_rowid,))
-
-    result = cursor.fetchone()
-    if not result:
-        return []
-
-    chat_id = result[0]
-
-    # Get preceding messages in the same chat
-    cursor.execute("""
+def chunked(items, size=SQL_CHUNK_SIZE):
+    """Split items into lists small enough to bind as IN (...) parameters."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def get_chat_ids(conn, joty_rowids):
+    """Find the chat each message belongs to, keyed by message ROWID."""
+    chat_ids = {}
+    for chunk in chunked(joty_rowids):
+        placeholders = ",".join("?" * len(chunk))
+        cursor = conn.execute(f"""
+            SELECT message_id, chat_id FROM chat_message_join WHERE message_id IN ({placeholders})
+        """, chunk)
+        for message_id, chat_id in cursor.fetchall():
+            chat_ids.setdefault(message_id, chat_id)
+    return chat_ids
+
+def get_context_messages(conn, chat_id, jotys, num_before=15):
+    """Get messages before each JOTY nomination in one chat, keyed by JOTY ROWID.
+
+    jotys holds (joty_rowid, joty_date) tuples. Rather than one DESC/LIMIT query
+    per JOTY, the chat is read forward once from the start of the earliest JOTY's
+    context up to the latest JOTY, and each context is sliced out by date.
+    """
+    earliest = min(date for _, date in jotys)
+    latest = max(date for _, date in jotys)
+
+    # Where the earliest JOTY's context starts; later JOTYs' contexts start after it
+    cursor = conn.execute(f"""
+        SELECT MIN(date) FROM (
+            SELECT m.date
+            FROM message m
+            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+            WHERE cmj.chat_id = ?
+            AND m.date < ?
+            {CONTEXT_FILTER}
+            ORDER BY m.date DESC
+            LIMIT ?
+        )
+    """, (chat_id, earliest, num_before))
+    start = cursor.fetchone()[0]
+    if start is None:
+        start = earliest
+
+    # Get preceding messages in the same chat, in chronological order
+    cursor = conn.execute(f"""
         SELECT
             m.ROWID,
             m.date,
@@ -69,44 +132,64 @@ def get_context_messages(conn, joty_rowid, joty_date, cache_roomnames, num_befor
         JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
         LEFT JOIN handle h ON m.handle_id = h.ROWID
         WHERE cmj.chat_id = ?
+        AND m.date >= ?
         AND m.date < ?
-        AND m.text IS NOT NULL
-        AND m.text != ''
-        AND m.text NOT LIKE 'Loved %'
-        AND m.text NOT LIKE 'Liked %'
-        AND m.text NOT LIKE 'Emphasized %'
-        AND m.text NOT LIKE 'Laughed at %'
-        ORDER BY m.date DESC
-        LIMIT ?
-    """, (chat_id, joty_date, num_before))
+        {CONTEXT_FILTER}
+        ORDER BY m.date
+    """, (chat_id, start, latest))
 
     messages = cursor.fetchall()
-    return list(reversed(messages))  # Chronological order
-
-def get_handle_name(conn, handle_id):
-    """Get the phone/email for a handle."""
-    if not handle_id:
-        return "Me"
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM handle WHERE ROWID = ?", (handle_id,))
-    result = cursor.fetchone()
-    return result[0] if result else "Unknown"
+    dates = [msg[1] for msg in messages]
+
+    contexts = {}
+    for joty_rowid, joty_date in jotys:
+        end = bisect_left(dates, joty_date)
+        contexts[joty_rowid] = messages[max(0, end - num_before):end]
+    return contexts
+
+def save_json(data, path):
+    """Write data as 2-space indented JSON, using orjson when it's installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+def connect_readonly(db_path):
+    """Open the Messages database read-only, tuned for one-off scans."""
+    # Not immutable=1: Messages keeps recent rows in the WAL, which that would skip.
+    conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, cached_statements=256)
+    for pragma in READONLY_PRAGMAS:
+        conn.execute(pragma)
+    return conn
 
 def main():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_readonly(DB_PATH)
 
     joty_messages = get_joty_messages(conn)
     print(f"Found {len(joty_messages)} JOTY nominations in 2025")
 
     all_contexts = []
+    chat_ids = get_chat_ids(conn, [j[0] for j in joty_messages])
+
+    # One pass over each chat covers every JOTY in it
+    jotys_by_chat = defaultdict(list)
+    for joty in joty_messages:
+        chat_id = chat_ids.get(joty[0])
+        if chat_id:
+            jotys_by_chat[chat_id].append((joty[0], joty[1]))
+    contexts = {}
+    for chat_id, jotys in jotys_by_chat.items():
+        contexts.update(get_context_messages(conn, chat_id, jotys))
 
     for joty in joty_messages:
-        rowid, date, text, is_from_me, handle_id, cache_roomnames = joty
+        rowid, date, text, is_from_me, handle_id, cache_roomnames, sender_id = joty
 
         joty_time = apple_time_to_datetime(date)
-        joty_sender = "Me" if is_from_me else get_handle_name(conn, handle_id)
+        joty_sender = "Me" if is_from_me else (sender_id or ("Me" if not handle_id else "Unknown"))
 
-        context_msgs = get_context_messages(conn, rowid, date, cache_roomnames)
+        context_msgs = contexts.get(rowid, [])
 
         context_list = []
         for msg in context_msgs:
@@ -127,8 +210,7 @@ def main():
         })
 
     # Save to JSON
-    with open(OUTPUT_PATH, 'w') as f:
-        json.dump(all_contexts, f, indent=2)
+    save_json(all_contexts, OUTPUT_PATH)
 
     print(f"Saved to {OUTPUT_PATH}")
 
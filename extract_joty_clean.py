@@ -3,10 +3,19 @@
 
 import sqlite3
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 import json
+import os
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DB_PATH = Path.home() / "Library/Messages/chat.db"
 OUTPUT_JSON = Path(__file__).parent / "joty_candidates.json"
 OUTPUT_MD = Path(__file__).parent / "joty_review.md"
@@ -21,34 +30,95 @@ EXCLUDED_CHATS = {
     "chat212275003571070051",
 }
 
+# Messages that talk about JOTY rather than nominating something
+META_REGEXES = [
+    r'joty.*voting',
+    r'joty.*results',
+    r'joty.*tabulated',
+    r'joty.*contender',
+    r'joty.*nom',
+    r'joty.*candidate',
+    r'personal joty',
+    r'doing joty',
+    r'give the joty',
+    r'joty.*winner',
+    r'joty.*refractory',
+    r'joty.*hilarity',
+    r'strava joty',
+    r'joty.*hit',
+]
+META_PATTERN = re.compile("|".join(META_REGEXES))
+
+# The literal patterns as GLOBs (against LOWER(text)) so SQLite can drop them
+# before rows reach Python. Patterns with '.*' stay Python-only: GLOB's '*' also
+# matches newlines, so it would reject texts the regex keeps.
+META_GLOBS = tuple(f"*{regex}*" for regex in META_REGEXES if '.*' not in regex)
+META_GLOB_FILTER = "\n".join("AND LOWER(m.text) NOT GLOB ?" for _ in META_GLOBS)
+
+# Tapback reactions are stored as messages like "Loved “...”"; none of them
+# are nominations or context. Shared by every query so the lists can't drift.
+TAPBACK_FILTER = """
+    AND m.text NOT LIKE 'Loved %'
+    AND m.text NOT LIKE 'Liked %'
+    AND m.text NOT LIKE 'Emphasized %'
+    AND m.text NOT LIKE 'Laughed at %'
+    AND m.text NOT LIKE 'Disliked %'
+"""
+CONTEXT_FILTER = """
+    AND m.text IS NOT NULL
+    AND m.text != ''
+""" + TAPBACK_FILTER
+
+# The str.isspace() set, i.e. everything str.strip() removes, so SQL's TRIM
+# measures length the same way
+WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+
+# Stay well under SQLite's default limit of 999 bound parameters per statement
+SQL_CHUNK_SIZE = 900
+
+# "00:00" through "23:59", indexed by minute of the day
+HHMM_LABELS = tuple(f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in range(60))
+
+READONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA cache_size = -262144",  # 256 MB page cache
+    "PRAGMA mmap_size = 1073741824",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Nominations are collected from local midnight on New Year's Day onward
+YEAR_START = datetime(2025, 1, 1)
+
 def apple_time_to_datetime(apple_time):
     unix_timestamp = apple_time / 1_000_000_000 + 978307200
     return datetime.fromtimestamp(unix_timestamp)
 
+@lru_cache(maxsize=None)
+def _local_utc_offset(slot):
+    return int(datetime.fromtimestamp(slot * 900).astimezone().utcoffset().total_seconds())
+
+def apple_time_to_hhmm(apple_time):
+    """Format Apple's timestamp as local HH:MM without building a datetime per message."""
+    unix_timestamp = apple_time // 1_000_000_000 + 978307200
+    # UTC offsets only change on quarter-hour boundaries, so one lookup per
+    # 15-minute slot covers DST without calling localtime for every message
+    local_minutes = (unix_timestamp + _local_utc_offset(unix_timestamp // 900)) // 60
+    return HHMM_LABELS[local_minutes % 1440]
+
+def datetime_to_apple_time(dt):
+    """Convert a local datetime to Apple's timestamp."""
+    return (int(dt.timestamp()) - 978307200) * 1_000_000_000
+
 def is_actual_nomination(text):
     """Filter to only keep actual JOTY nominations, not meta-commentary."""
     text_lower = text.lower().strip()
 
-    meta_patterns = [
-        r'joty.*voting',
-        r'joty.*results',
-        r'joty.*tabulated',
-        r'joty.*contender',
-        r'joty.*nom',
-        r'joty.*candidate',
-        r'personal joty',
-        r'doing joty',
-        r'give the joty',
-        r'joty.*winner',
-        r'joty.*refractory',
-        r'joty.*hilarity',
-        r'strava joty',
-        r'joty.*hit',
-    ]
-
-    for pattern in meta_patterns:
-        if re.search(pattern, text_lower):
-            return False
+    if META_PATTERN.search(text_lower):
+        return False
 
     if len(text.strip()) > 20:
         return False
@@ -56,8 +126,7 @@ def is_actual_nomination(text):
     return True
 
 def get_joty_messages(conn):
-    cursor = conn.cursor()
-    cursor.execute("""
+    cursor = conn.execute(f"""
         SELECT
             m.ROWID,
             m.date,
@@ -66,97 +135,100 @@ def get_joty_messages(conn):
             m.handle_id,
             m.cache_roomnames,
             m.thread_originator_guid,
-            m.guid
+            m.guid,
+            h.id AS sender_id
         FROM message m
-        WHERE LOWER(m.text) LIKE '%joty%'
-        AND datetime(m.date/1000000000 + 978307200, 'unixepoch', 'localtime') >= '2025-01-01'
-        AND m.text NOT LIKE 'Loved %'
-        AND m.text NOT LIKE 'Liked %'
-        AND m.text NOT LIKE 'Emphasized %'
-        AND m.text NOT LIKE 'Laughed at %'
-        AND m.text NOT LIKE 'Disliked %'
+        LEFT JOIN handle h ON m.handle_id = h.ROWID
+        WHERE m.text LIKE '%joty%'  -- LIKE is already case-insensitive for ASCII
+        AND m.date >= ?
+        {TAPBACK_FILTER}
+        AND LENGTH(TRIM(m.text, ?)) <= 20
+        {META_GLOB_FILTER}
         ORDER BY m.date
-    """)
+    """, (datetime_to_apple_time(YEAR_START), WHITESPACE, *META_GLOBS))
 
     results = cursor.fetchall()
     return [r for r in results if is_actual_nomination(r[2])]
 
-def get_chat_info(conn, joty_rowid):
-    """Get chat name for a message."""
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT c.ROWID, c.display_name, c.chat_identifier
-        FROM chat c
-        JOIN chat_message_join cmj ON c.ROWID = cmj.chat_id
-        WHERE cmj.message_id = ?
-    """, (joty_rowid,))
-    result = cursor.fetchone()
-    if result:
-        chat_id, display_name, chat_identifier = result
-        name = display_name if display_name else chat_identifier
-        return chat_id, name
-    return None, "Unknown Chat"
-
-def get_thread_context(conn, thread_originator_guid, joty_date, joty_rowid, chat_id, num_before_thread=5):
+def chunked(items, size=SQL_CHUNK_SIZE):
+    """Split items into lists small enough to bind as IN (...) parameters."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def get_chat_info(conn, joty_rowids):
+    """Get chat id and name for each message, keyed by message ROWID."""
+    chat_info = {}
+    for chunk in chunked(joty_rowids):
+        placeholders = ",".join("?" * len(chunk))
+        cursor = conn.execute(f"""
+            SELECT cmj.message_id, c.ROWID, c.display_name, c.chat_identifier
+            FROM chat c
+            JOIN chat_message_join cmj ON c.ROWID = cmj.chat_id
+            WHERE cmj.message_id IN ({placeholders})
+        """, chunk)
+        for message_id, chat_id, display_name, chat_identifier in cursor.fetchall():
+            name = display_name if display_name else chat_identifier
+            chat_info.setdefault(message_id, (chat_id, name))
+    return chat_info
+
+def get_thread_originators(conn, thread_originator_guids):
+    """Get the thread originator message for each guid, keyed by guid."""
+    originators = {}
+    for chunk in chunked(thread_originator_guids):
+        placeholders = ",".join("?" * len(chunk))
+        cursor = conn.execute(f"""
+            SELECT m.guid, m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
+            FROM message m
+            LEFT JOIN handle h ON m.handle_id = h.ROWID
+            WHERE m.guid IN ({placeholders})
+        """, chunk)
+        for guid, *originator in cursor.fetchall():
+            originators[guid] = tuple(originator)
+    return originators
+
+def get_thread_context(conn, originators, thread_originator_guid, joty_date, joty_rowid, chat_id, num_before_thread=5):
     """Get thread context: messages before thread start + all thread messages up to JOTY."""
-    cursor = conn.cursor()
-
-    # First, find the thread originator message
-    cursor.execute("""
-        SELECT m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
-        FROM message m
-        LEFT JOIN handle h ON m.handle_id = h.ROWID
-        WHERE m.guid = ?
-    """, (thread_originator_guid,))
-
-    originator = cursor.fetchone()
+    # The thread originator was preloaded by get_thread_originators
+    originator = originators.get(thread_originator_guid)
     if not originator:
-        return [], False
+        return [], False, 0
 
     originator_rowid, originator_date, _, _, _, _ = originator
 
-    # Get messages before the thread originator (for context)
-    cursor.execute("""
-        SELECT m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
-        FROM message m
-        JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-        LEFT JOIN handle h ON m.handle_id = h.ROWID
-        WHERE cmj.chat_id = ?
-        AND m.date < ?
-        AND m.text IS NOT NULL
-        AND m.text != ''
-        AND m.text NOT LIKE 'Loved %'
-        AND m.text NOT LIKE 'Liked %'
-        AND m.text NOT LIKE 'Emphasized %'
-        AND m.text NOT LIKE 'Laughed at %'
-        AND m.thread_originator_guid IS NULL
-        ORDER BY m.date DESC
-        LIMIT ?
-    """, (chat_id, originator_date, num_before_thread))
-
-    pre_thread_msgs = list(reversed(cursor.fetchall()))
-
-    # Add the thread originator
-    thread_msgs = [originator]
-
-    # Get all thread replies up to (but not including) JOTY - we add JOTY separately at the end
-    cursor.execute("""
-        SELECT m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
+    # One round trip for both halves, tagged by src:
+    #   'pre'   - messages before the thread originator (for context)
+    #   'reply' - thread replies up to (but not including) JOTY - we add JOTY separately at the end
+    cursor = conn.execute(f"""
+        SELECT 'pre' AS src, * FROM (
+            SELECT m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
+            FROM message m
+            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+            LEFT JOIN handle h ON m.handle_id = h.ROWID
+            WHERE cmj.chat_id = ?
+            AND m.date < ?
+            {CONTEXT_FILTER}
+            AND m.thread_originator_guid IS NULL
+            ORDER BY m.date DESC
+            LIMIT ?
+        )
+        UNION ALL
+        SELECT 'reply', m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
         FROM message m
         LEFT JOIN handle h ON m.handle_id = h.ROWID
         WHERE m.thread_originator_guid = ?
         AND m.date < ?
-        AND m.text IS NOT NULL
-        AND m.text != ''
-        AND m.text NOT LIKE 'Loved %'
-        AND m.text NOT LIKE 'Liked %'
-        AND m.text NOT LIKE 'Emphasized %'
-        AND m.text NOT LIKE 'Laughed at %'
-        ORDER BY m.date
-    """, (thread_originator_guid, joty_date))
-
-    thread_replies = cursor.fetchall()
-    thread_msgs.extend(thread_replies)
+        {CONTEXT_FILTER}
+        ORDER BY src, date
+    """, (chat_id, originator_date, num_before_thread, thread_originator_guid, joty_date))
+
+    pre_thread_msgs = []
+    thread_msgs = [originator]  # The thread starts with its originator
+    for src, *msg in cursor:
+        if src == 'pre':
+            pre_thread_msgs.append(tuple(msg))
+        else:
+            thread_msgs.append(tuple(msg))
 
     # Mark which messages are part of the thread
     # Return tuple: (messages, is_thread, thread_start_index)
@@ -164,37 +236,38 @@ def get_thread_context(conn, thread_originator_guid, joty_date, joty_rowid, chat
     thread_start_index = len(pre_thread_msgs)  # Index where thread begins
     return all_msgs, True, thread_start_index
 
-def get_regular_context(conn, joty_rowid, joty_date, chat_id, num_before=15):
-    """Get regular context for non-threaded JOTY."""
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT m.ROWID, m.date, m.text, m.is_from_me, h.id as sender, m.cache_has_attachments
-        FROM message m
-        JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-        LEFT JOIN handle h ON m.handle_id = h.ROWID
-        WHERE cmj.chat_id = ?
-        AND m.date < ?
-        AND m.text IS NOT NULL
-        AND m.text != ''
-        AND m.text NOT LIKE 'Loved %'
-        AND m.text NOT LIKE 'Liked %'
-        AND m.text NOT LIKE 'Emphasized %'
-        AND m.text NOT LIKE 'Laughed at %'
-        ORDER BY m.date DESC
-        LIMIT ?
-    """, (chat_id, joty_date, num_before))
-
-    return list(reversed(cursor.fetchall()))
-
-def get_handle_name(conn, handle_id):
-    if not handle_id:
-        return "Me"
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM handle WHERE ROWID = ?", (handle_id,))
-    result = cursor.fetchone()
-    return result[0] if result else "Unknown"
-
+def get_regular_contexts(conn, jotys, num_before=15):
+    """Get regular context for non-threaded JOTYs, keyed by JOTY ROWID.
+
+    jotys holds (joty_rowid, joty_date, chat_id) tuples; each chunk of them is
+    answered by a single query instead of one query per JOTY.
+    """
+    contexts = {}
+    for chunk in chunked(jotys, SQL_CHUNK_SIZE // 3):
+        values = ",".join(["(?, ?, ?)"] * len(chunk))
+        params = [value for joty in chunk for value in joty]
+        cursor = conn.execute(f"""
+            WITH jotys(joty_rowid, joty_date, chat_id) AS (VALUES {values})
+            SELECT j.joty_rowid, ctx.ROWID, ctx.date, ctx.text, ctx.is_from_me, h.id as sender, ctx.cache_has_attachments
+            FROM jotys j
+            JOIN message ctx ON ctx.ROWID IN (
+                SELECT m.ROWID
+                FROM message m
+                JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+                WHERE cmj.chat_id = j.chat_id
+                AND m.date < j.joty_date
+                {CONTEXT_FILTER}
+                ORDER BY m.date DESC
+                LIMIT ?
+            )
+            LEFT JOIN handle h ON ctx.handle_id = h.ROWID
+            ORDER BY j.joty_rowid, ctx.date
+        """, (*params, num_before))
+        for joty_rowid, rows in groupby(cursor, key=itemgetter(0)):
+            contexts[joty_rowid] = [row[1:] for row in rows]
+    return contexts
+
+@lru_cache(maxsize=None)
 def format_sender(sender):
     if sender == "Me":
         return "Jesse"
@@ -204,123 +277,155 @@ def format_sender(sender):
         return sender.split("@")[0]
     return sender or "Unknown"
 
+def dumps_json(obj):
+    """Serialize obj as 2-space indented JSON, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+def connect_readonly(db_path):
+    """Open the Messages database read-only, tuned for one-off scans."""
+    # Not immutable=1: Messages keeps recent rows in the WAL, which that would skip.
+    conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, cached_statements=256)
+    for pragma in READONLY_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 def main():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_readonly(DB_PATH)
 
     joty_messages = get_joty_messages(conn)
     print(f"Found {len(joty_messages)} actual JOTY nominations in 2025")
 
-    all_contexts = []
-    md_content = "# JOTY 2025 Candidates\n\n"
-    md_content += "Review each JOTY and its context. Delete entries that aren't actual nominations.\n\n"
-    md_content += "---\n\n"
+    chat_info = get_chat_info(conn, [j[0] for j in joty_messages])
+    originators = get_thread_originators(conn, {j[6] for j in joty_messages if j[6]})
 
-    idx = 0
+    # Anything that isn't a reply to a known thread gets regular context
+    regular_jotys = []
     for joty in joty_messages:
-        rowid, date, text, is_from_me, handle_id, cache_roomnames, thread_originator_guid, guid = joty
-
-        joty_time = apple_time_to_datetime(date)
-        joty_sender = "Jesse" if is_from_me else format_sender(get_handle_name(conn, handle_id))
-
-        chat_id, chat_name = get_chat_info(conn, rowid)
-
-        # Skip excluded chats
-        if chat_name in EXCLUDED_CHATS:
-            continue
-
-        idx += 1
-
-        # Determine if this is a thread reply or regular message
-        is_thread = False
-        thread_start_index = 0
-        if thread_originator_guid and chat_id:
-            context_msgs, is_thread, thread_start_index = get_thread_context(
-                conn, thread_originator_guid, date, rowid, chat_id
-            )
-
-        if not is_thread and chat_id:
-            context_msgs = get_regular_context(conn, rowid, date, chat_id)
-        elif not chat_id:
-            context_msgs = []
-
-        context_list = []
-        for i, msg in enumerate(context_msgs):
-            msg_rowid, msg_date, msg_text, msg_is_from_me, sender, has_attachments = msg
-            sender_name = "Jesse" if msg_is_from_me else format_sender(sender)
-
-            # Mark if this message is part of the thread (at or after thread_start_index)
-            in_thread = is_thread and i >= thread_start_index
-
+        chat_id, chat_name = chat_info.get(joty[0], (None, "Unknown Chat"))
+        if chat_id and chat_name not in EXCLUDED_CHATS and joty[6] not in originators:
+            regular_jotys.append((joty[0], joty[1], chat_id))
+    regular_contexts = get_regular_contexts(conn, regular_jotys)
+
+    # Both outputs are written one entry at a time rather than built up in memory,
+    # into temp files that only replace the real ones once every JOTY succeeded
+    json_tmp = OUTPUT_JSON.with_suffix('.json.tmp')
+    md_tmp = OUTPUT_MD.with_suffix('.md.tmp')
+    with open(json_tmp, 'w', encoding='utf-8') as json_file, open(md_tmp, 'w', encoding='utf-8') as md_file:
+        md_file.write("# JOTY 2025 Candidates\n\n")
+        md_file.write("Review each JOTY and its context. Delete entries that aren't actual nominations.\n\n")
+        md_file.write("---\n\n")
+
+        idx = 0
+        thread_count = 0
+        for joty in joty_messages:
+            rowid, date, text, is_from_me, handle_id, cache_roomnames, thread_originator_guid, guid, sender_id = joty
+
+            joty_time = apple_time_to_datetime(date)
+            joty_sender = "Jesse" if is_from_me else format_sender(sender_id or ("Me" if not handle_id else "Unknown"))
+
+            chat_id, chat_name = chat_info.get(rowid, (None, "Unknown Chat"))
+
+            # Skip excluded chats
+            if chat_name in EXCLUDED_CHATS:
+                continue
+
+            idx += 1
+
+            # Determine if this is a thread reply or regular message
+            is_thread = False
+            thread_start_index = 0
+            if thread_originator_guid and chat_id:
+                context_msgs, is_thread, thread_start_index = get_thread_context(
+                    conn, originators, thread_originator_guid, date, rowid, chat_id
+                )
+
+            if not is_thread and chat_id:
+                context_msgs = regular_contexts.get(rowid, [])
+            elif not chat_id:
+                context_msgs = []
+
+            # Build markdown while the context is assembled, straight from the
+            # row values, instead of re-reading every context dict afterwards
+            thread_marker = " 🧵" if is_thread else ""
+            md_file.write(f"## JOTY #{idx} — {joty_time.strftime('%b %d, %Y %I:%M %p')}{thread_marker}\n\n")
+            md_file.write(f"**Chat:** {chat_name}  \n")
+            md_file.write(f"**Nominated by:** {joty_sender}\n\n")
+            md_file.write("**Context:**\n```\n")
+
+            context_list = []
+            for i, msg in enumerate(context_msgs):
+                msg_rowid, msg_date, msg_text, msg_is_from_me, sender, has_attachments = msg
+                msg_time = apple_time_to_hhmm(msg_date)
+                sender_name = "Jesse" if msg_is_from_me else format_sender(sender)
+                has_image = bool(has_attachments)
+
+                # Mark if this message is part of the thread (at or after thread_start_index)
+                in_thread = is_thread and i >= thread_start_index
+
+                context_list.append({
+                    "time": msg_time,
+                    "sender": sender_name,
+                    "text": msg_text,
+                    "has_image": has_image,
+                    "in_thread": in_thread,
+                })
+                img = " 📷" if has_image else ""
+                md_file.write(f"{msg_time} {sender_name}: {msg_text}{img}\n")
+
+            # Add the JOTY message itself at the end (it's part of the thread if this is a thread)
+            joty_text = text.strip()
+            joty_hhmm = joty_time.strftime("%H:%M")
             context_list.append({
-                "time": apple_time_to_datetime(msg_date).strftime("%H:%M"),
-                "sender": sender_name,
-                "text": msg_text,
-                "has_image": bool(has_attachments),
-                "in_thread": in_thread,
+                "time": joty_hhmm,
+                "sender": joty_sender,
+                "text": joty_text,
+                "has_image": False,
+                "is_joty": True,
+                "in_thread": is_thread,
             })
-
-        # Add the JOTY message itself at the end (it's part of the thread if this is a thread)
-        context_list.append({
-            "time": joty_time.strftime("%H:%M"),
-            "sender": joty_sender,
-            "text": text.strip(),
-            "has_image": False,
-            "is_joty": True,
-            "in_thread": is_thread,
-        })
-
-        entry = {
-            "id": idx,
-            "joty_time": joty_time.strftime("%Y-%m-%d %H:%M"),
-            "joty_text": text.strip(),
-            "joty_sender": joty_sender,
-            "chat_name": chat_name,
-            "is_thread": is_thread,
-            "context": context_list
-        }
-        all_contexts.append(entry)
-
-        # Build markdown
-        thread_marker = " 🧵" if is_thread else ""
-        md_content += f"## JOTY #{idx} — {joty_time.strftime('%b %d, %Y %I:%M %p')}{thread_marker}\n\n"
-        md_content += f"**Chat:** {chat_name}  \n"
-        md_content += f"**Nominated by:** {joty_sender}\n\n"
-        md_content += "**Context:**\n```\n"
-
-        for msg in context_list:
-            img = " 📷" if msg.get('has_image') else ""
-            if msg.get('is_joty'):
-                md_content += f"{msg['time']} {msg['sender']}: ⭐ {msg['text']} ⭐\n"
-            else:
-                md_content += f"{msg['time']} {msg['sender']}: {msg['text']}{img}\n"
-
-        md_content += "```\n\n"
-
-        # Identify likely joke
-        joke_candidates = [m for m in context_list if m['text'] and len(m['text']) > 5 and not m.get('is_joty')]
-        if joke_candidates:
-            last_msg = joke_candidates[-1]
-            md_content += f"**Likely joke:** \"{last_msg['text']}\" — {last_msg['sender']}"
-            if last_msg.get('has_image'):
-                md_content += f" 📷\n\n*Search on phone:* `{last_msg['text'][:40]}`"
-            md_content += "\n\n"
-
-        md_content += "---\n\n"
-
-    # Save JSON
-    with open(OUTPUT_JSON, 'w') as f:
-        json.dump(all_contexts, f, indent=2)
-
-    # Save markdown
-    with open(OUTPUT_MD, 'w') as f:
-        f.write(md_content)
+            md_file.write(f"{joty_hhmm} {joty_sender}: ⭐ {joty_text} ⭐\n")
+
+            entry = {
+                "id": idx,
+                "joty_time": joty_time.strftime("%Y-%m-%d %H:%M"),
+                "joty_text": joty_text,
+                "joty_sender": joty_sender,
+                "chat_name": chat_name,
+                "is_thread": is_thread,
+                "context": context_list
+            }
+            thread_count += is_thread
+
+            # Stream the entry as the next element of the JSON array, laid out
+            # exactly as dumping the whole list with indent=2 would
+            json_file.write("[\n" if idx == 1 else ",\n")
+            # (only "\n" is indented: orjson leaves U+2028 etc. unescaped in strings,
+            # which textwrap.indent would treat as line breaks)
+            json_file.write("  " + dumps_json(entry).replace("\n", "\n  "))
+
+            md_file.write("```\n\n")
+
+            # Identify likely joke
+            last_msg = next((m for m in reversed(context_list) if m['text'] and len(m['text']) > 5 and not m.get('is_joty')), None)
+            if last_msg:
+                md_file.write(f"**Likely joke:** \"{last_msg['text']}\" — {last_msg['sender']}")
+                if last_msg.get('has_image'):
+                    md_file.write(f" 📷\n\n*Search on phone:* `{last_msg['text'][:40]}`")
+                md_file.write("\n\n")
+
+            md_file.write("---\n\n")
+
+        json_file.write("\n]" if idx else "[]")
+
+    os.replace(json_tmp, OUTPUT_JSON)
+    os.replace(md_tmp, OUTPUT_MD)
 
     print(f"Saved JSON: {OUTPUT_JSON}")
     print(f"Saved review file: {OUTPUT_MD}")
 
-    # Count threads
-    thread_count = sum(1 for ctx in all_contexts if ctx['is_thread'])
-    print(f"Thread replies: {thread_count}, Regular messages: {len(all_contexts) - thread_count}")
+    print(f"Thread replies: {thread_count}, Regular messages: {idx - thread_count}")
 
     conn.close()
 
@@ -4,6 +4,11 @@
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 INPUT_JSON = Path(__file__).parent / "joty_candidates.json"
 OUTPUT_JSON = Path(__file__).parent / "joty_candidates.json"
 OUTPUT_MD = Path(__file__).parent / "joty_review.md"
@@ -24,19 +29,37 @@ NAME_MAP = {
 def map_name(sender):
     return NAME_MAP.get(sender, sender)
 
+def remap_sender(record, key):
+    """Map record[key] through NAME_MAP; return whether it changed."""
+    name = map_name(record[key])
+    if name == record[key]:
+        return False
+    record[key] = name
+    return True
+
+def save_json(data, path):
+    """Write data as 2-space indented JSON, using orjson when it's installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
 def main():
-    with open(INPUT_JSON) as f:
+    with open(INPUT_JSON, encoding='utf-8') as f:
         data = json.load(f)
 
     # Update names
+    changed = False
     for item in data:
-        item['joty_sender'] = map_name(item['joty_sender'])
+        changed |= remap_sender(item, 'joty_sender')
         for msg in item['context']:
-            msg['sender'] = map_name(msg['sender'])
+            changed |= remap_sender(msg, 'sender')
 
-    # Save updated JSON
-    with open(OUTPUT_JSON, 'w') as f:
-        json.dump(data, f, indent=2)
+    # Save updated JSON, skipping the rewrite when every name was already mapped
+    if changed:
+        save_json(data, OUTPUT_JSON)
 
     # Regenerate markdown
     md_content = "# JOTY 2025 Candidates\n\n"
@@ -63,9 +86,8 @@ def main():
         md_content += "```\n\n"
 
         # Identify likely joke (exclude the JOTY message itself)
-        joke_candidates = [m for m in item['context'] if m['text'] and len(m['text']) > 5 and not m.get('is_joty')]
-        if joke_candidates:
-            last_msg = joke_candidates[-1]
+        last_msg = next((m for m in reversed(item['context']) if m['text'] and len(m['text']) > 5 and not m.get('is_joty')), None)
+        if last_msg:
             md_content += f"**Likely joke:** \"{last_msg['text']}\" — {last_msg['sender']}"
             if last_msg.get('has_image'):
                 md_content += f" 📷\n\n*Search on phone:* `{last_msg['text'][:40]}`"
@@ -73,11 +95,14 @@ def main():
 
         md_content += "---\n\n"
 
-    with open(OUTPUT_MD, 'w') as f:
+    with open(OUTPUT_MD, 'w', encoding='utf-8') as f:
         f.write(md_content)
 
     print(f"Updated {len(data)} entries")
-    print(f"Saved: {OUTPUT_JSON}")
+    if changed:
+        print(f"Saved: {OUTPUT_JSON}")
+    else:
+        print(f"Names already mapped, left unchanged: {OUTPUT_JSON}")
     print(f"Saved: {OUTPUT_MD}")
 
 if __name__ == "__main__":
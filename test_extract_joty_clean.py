@@ -0,0 +1,64 @@
+"""Check that the SQL prefilter in get_joty_messages never drops a real nomination."""
+
+import sqlite3
+import sys
+
+import extract_joty_clean as ejc
+
+TEXTS = [
+    "JOTY",
+    "joty",
+    "JOTY Will",
+    "JOTY!!",
+    "JOTY\nnom",
+    "joty\nhit",
+    "JOTY\nvoting",
+    "JOTY" + "\xa0" * 20,
+    " " * 10 + "JOTY" + "　" * 10,
+    "JOTY\x1c\x1d\x1e\x1f\x85" * 3,
+    "JOTY\n\n" + " " * 30,
+    "JOTY nominations",
+    "joty voting time",
+    "strava joty",
+    "Personal JOTY",
+    "give the joty",
+    "JOTY for this one is way too long to count",
+    "Loved “JOTY”",
+]
+
+def make_db(texts):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE handle(ROWID INTEGER PRIMARY KEY, id TEXT);
+        CREATE TABLE message(
+            ROWID INTEGER PRIMARY KEY, guid TEXT, date INTEGER, text TEXT, is_from_me INTEGER,
+            handle_id INTEGER, cache_roomnames TEXT, thread_originator_guid TEXT
+        );
+    """)
+    date = ejc.datetime_to_apple_time(ejc.YEAR_START)
+    for i, text in enumerate(texts):
+        conn.execute(
+            "INSERT INTO message VALUES (?, ?, ?, ?, 0, 0, NULL, NULL)",
+            (i + 1, f"G{i}", date + i, text),
+        )
+    return conn
+
+def test_prefilter_matches_python_filter():
+    conn = make_db(TEXTS)
+
+    # What get_joty_messages returns without the pushed-down checks
+    unfiltered = conn.execute(f"""
+        SELECT m.text FROM message m
+        WHERE m.text LIKE '%joty%'
+        AND m.date >= ?
+        {ejc.TAPBACK_FILTER}
+        ORDER BY m.date
+    """, (ejc.datetime_to_apple_time(ejc.YEAR_START),)).fetchall()
+    expected = [text for (text,) in unfiltered if ejc.is_actual_nomination(text)]
+
+    assert [r[2] for r in ejc.get_joty_messages(conn)] == expected
+    assert "JOTY\nnom" in expected
+    assert "JOTY" + "\xa0" * 20 in expected
+
+def test_whitespace_is_the_isspace_set():
+    assert ejc.WHITESPACE == "".join(c for c in map(chr, range(sys.maxunicode + 1)) if c.isspace())